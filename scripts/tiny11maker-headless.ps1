@@ -71,6 +71,10 @@ $tiny11Dir = "$ScratchDisk\tiny11"
 $outputISO = "$PSScriptRoot\tiny11.iso"
 $logFile = "$PSScriptRoot\tiny11_$(Get-Date -Format yyyyMMdd_HHmmss).log"
 
+# Resolve the localized Administrators group name once and reuse it for every takeown/icacls call
+$adminSID = New-Object System.Security.Principal.SecurityIdentifier("S-1-5-32-544")
+$adminAccount = $adminSID.Translate([System.Security.Principal.NTAccount]).Value
+
 #---------[ Functions ]---------#
 function Write-Log {
     param([string]$Message, [string]$Level = "INFO")
@@ -108,6 +112,46 @@ function Remove-RegistryValue {
     }
 }
 
+function Invoke-DownloadWithRetry {
+    param(
+        [string]$Uri,
+        [string]$OutFile,
+        [int]$MaxAttempts = 5
+    )
+    for ($attempt = 1; $attempt -le $MaxAttempts; $attempt++) {
+        try {
+            Invoke-WebRequest -Uri $Uri -OutFile $OutFile -UseBasicParsing
+            return
+        }
+        catch {
+            $err = $_
+            $exception = $err.Exception
+            
+            # Only retry throttling, server errors and network failures that produced no response;
+            # 4xx responses and local file errors are permanent and surface immediately
+            $statusCode = 0
+            if ($exception.PSObject.Properties['Response'] -and $exception.Response) {
+                $statusCode = [int]$exception.Response.StatusCode
+            }
+            $isNetworkError = $exception.GetType().Name -in @('WebException', 'HttpRequestException')
+            $isTransient = ($statusCode -in @(429, 500, 502, 503, 504)) -or ($statusCode -eq 0 -and $isNetworkError)
+            
+            if ($attempt -eq $MaxAttempts -or -not $isTransient) { throw }
+            
+            # Honor Retry-After (capped at 60s), otherwise back off exponentially
+            $delay = [int][math]::Pow(2, $attempt)
+            try {
+                $retryAfter = [int]$exception.Response.Headers['Retry-After']
+                if ($retryAfter -gt 0) { $delay = [math]::Min($retryAfter, 60) }
+            }
+            catch { }
+            $delayMs = $delay * 1000 + (Get-Random -Minimum 0 -Maximum 1000)
+            Write-Log "Download failed (attempt $attempt/$MaxAttempts): $($exception.Message). Retrying in ${delay}s..." "WARN"
+            Start-Sleep -Milliseconds $delayMs
+        }
+    }
+}
+
 function Test-Prerequisites {
     Write-Log "Checking prerequisites..."
     
@@ -209,8 +253,6 @@ function Mount-WindowsImageFile {
     
     # Take ownership and set permissions
     & takeown /F $wimFilePath /A | Out-Null
-    $adminSID = New-Object System.Security.Principal.SecurityIdentifier("S-1-5-32-544")
-    $adminAccount = $adminSID.Translate([System.Security.Principal.NTAccount]).Value
     & icacls $wimFilePath /grant "${adminAccount}:(F)" | Out-Null
     
     Set-ItemProperty -Path $wimFilePath -Name IsReadOnly -Value $false -ErrorAction SilentlyContinue
@@ -224,11 +266,13 @@ function Get-ImageMetadata {
     
     # Get language
     $imageIntl = & dism /English /Get-Intl "/Image:$scratchDir"
-    $languageLine = $imageIntl -split '\n' | Where-Object { $_ -match 'Default system UI language : ([a-zA-Z]{2}-[a-zA-Z]{2})' }
     
-    if ($languageLine) {
-        $script:languageCode = $Matches[1]
-        Write-Log "Language: $script:languageCode"
+    foreach ($line in $imageIntl -split '\r?\n') {
+        if ($line -match 'Default system UI language : ([a-zA-Z]{2}-[a-zA-Z]{2})') {
+            $script:languageCode = $Matches[1]
+            Write-Log "Language: $script:languageCode"
+            break
+        }
     }
     
     # Get architecture
@@ -316,10 +360,11 @@ function Remove-BloatwareApps {
         'Microsoft.Recall'
     )
     
-    $packagesToRemove = $packages | Where-Object {
-        $packageName = $_
-        $packagePrefixes | Where-Object { $packageName -like "*$_*" }
-    }
+    # Match every package against a single alternation regex instead of looping over each prefix
+    $escapedPrefixes = $packagePrefixes | ForEach-Object { [regex]::Escape($_) }
+    $packagePattern = [regex]::new(($escapedPrefixes -join '|'), 'IgnoreCase')
+    
+    $packagesToRemove = $packages | Where-Object { $packagePattern.IsMatch($_) }
     
     $removeCount = 0
     foreach ($package in $packagesToRemove) {
@@ -334,9 +379,6 @@ function Remove-BloatwareApps {
 function Remove-EdgeAndOneDrive {
     Write-Log "Removing Microsoft Edge..."
     
-    $adminSID = New-Object System.Security.Principal.SecurityIdentifier("S-1-5-32-544")
-    $adminAccount = $adminSID.Translate([System.Security.Principal.NTAccount]).Value
-    
     $edgePaths = @(
         "$scratchDir\Program Files (x86)\Microsoft\Edge",
         "$scratchDir\Program Files (x86)\Microsoft\EdgeUpdate",
@@ -564,8 +606,17 @@ function Dismount-AndExport {
     & Dism.exe /Export-Image /SourceImageFile:$wimFilePath /SourceIndex:$INDEX `
         /DestinationImageFile:$tempWim /Compress:recovery | Out-Null
     
-    Remove-Item -Path $wimFilePath -Force
-    Rename-Item -Path $tempWim -NewName "install.wim"
+    # Only replace the original once the export has fully succeeded, so an interrupted
+    # or failed export never leaves the build without a valid install.wim
+    if ($LASTEXITCODE -ne 0 -or -not (Test-Path $tempWim)) {
+        Remove-Item -Path $tempWim -Force -ErrorAction SilentlyContinue
+        throw "Image export failed (DISM exit code $LASTEXITCODE)"
+    }
+    
+    # File.Replace overwrites the original in a single ReplaceFile call instead of the
+    # delete-then-move that Move-Item -Force does on Windows PowerShell 5.1. [NullString]
+    # is required because PowerShell passes $null to a string parameter as ""
+    [System.IO.File]::Replace($tempWim, $wimFilePath, [NullString]::Value)
     
     Write-Log "Install.wim export complete"
 }
@@ -576,8 +627,6 @@ function Invoke-BootImageProcessing {
     $bootWimPath = "$tiny11Dir\sources\boot.wim"
     
     # Take ownership
-    $adminSID = New-Object System.Security.Principal.SecurityIdentifier("S-1-5-32-544")
-    $adminAccount = $adminSID.Translate([System.Security.Principal.NTAccount]).Value
     & takeown /F $bootWimPath /A | Out-Null
     & icacls $bootWimPath /grant "${adminAccount}:(F)" | Out-Null
     Set-ItemProperty -Path $bootWimPath -Name IsReadOnly -Value $false -ErrorAction SilentlyContinue
@@ -635,7 +684,7 @@ function New-TinyISO {
         $url = "https://msdl.microsoft.com/download/symbols/oscdimg.exe/3D44737265000/oscdimg.exe"
         
         if (-not (Test-Path $localOSCDIMGPath)) {
-            Invoke-WebRequest -Uri $url -OutFile $localOSCDIMGPath -UseBasicParsing
+            Invoke-DownloadWithRetry -Uri $url -OutFile $localOSCDIMGPath
             Write-Log "Downloaded oscdimg.exe"
         }
         